@@ -1,5 +1,7 @@
 import os
+import functools
 import warnings
+import numpy as np
 import gradio as gr
 from pathlib import Path
 from typing import Union, Dict
@@ -7,6 +9,8 @@ import modules.scripts as scripts
 import modules.shared as shared
 from modules.sd_models import select_checkpoint
 from modules.processing import process_images
+from ldm.modules.diffusionmodules.openaimodel import UNetModel as UNetModelLDM
+from sgm.modules.diffusionmodules.openaimodel import UNetModel as UNetModelSGM
 
 from compile_ldm import compile_ldm_unet, SD21CompileCtx
 from compile_sgm import compile_sgm_unet
@@ -28,8 +32,59 @@ compiled_unet = None
 is_unet_quantized = False
 compiled_ckpt_name = None
 
+# the installed onediff_quant/oneflow can't change within a webui process,
+# so probe once instead of on every UI build and compile
+_can_use_quantization = functools.lru_cache(maxsize=1)(varify_can_use_quantization)
+
+_unet_compilers = {
+    UNetModelLDM: compile_ldm_unet,
+    UNetModelSGM: compile_sgm_unet,
+}
+
+
+def _get_unet_compiler(unet_type):
+    if unet_type in _unet_compilers:
+        return _unet_compilers[unet_type]
+    # subclasses of the ldm/sgm UNetModel are resolved once and cached by type
+    compile_fn = next(
+        (_unet_compilers[t] for t in unet_type.__mro__ if t in _unet_compilers),
+        None,
+    )
+    if compile_fn is not None:
+        _unet_compilers[unet_type] = compile_fn
+    return compile_fn
+
+
+_HINTS_HTML = """
+    <div style="padding: 20px; border: 1px solid #e0e0e0; border-radius: 5px; background-color: #f9f9f9;">
+        <div style="font-size: 18px; font-weight: bold; margin-bottom: 15px; color: #31708f;">
+            Hints Message
+        </div>
+        <div style="padding: 10px; border: 1px solid #31708f; border-radius: 5px; background-color: #f9f9f9;">
+            Hints: Enterprise function is not supported on your system.
+        </div>
+        <p style="margin-top: 15px;">
+            If you need Enterprise Level Support for your system or business, please send an email to 
+            <a href="mailto:business@siliconflow.com" style="color: #31708f; text-decoration: none;">business@siliconflow.com</a>.
+            <br>
+            Tell us about your use case, deployment scale, and requirements.
+        </p>
+        <p>
+            <strong>GitHub Issue:</strong>
+            <a href="https://github.com/siliconflow/onediff/issues" style="color: #31708f; text-decoration: none;">https://github.com/siliconflow/onediff/issues</a>
+        </p>
+    </div>
+"""
+
+
 def generate_graph_path(ckpt_name: str, model_name: str) -> str:
     base_output_dir = shared.opts.outdir_samples or shared.opts.outdir_txt2img_samples
+    return _generate_graph_path(base_output_dir, ckpt_name, model_name)
+
+
+# keyed on the output dir as well, so changing it in the settings takes effect
+@functools.lru_cache(maxsize=32)
+def _generate_graph_path(base_output_dir: str, ckpt_name: str, model_name: str) -> str:
     save_ckpt_graphs_path = os.path.join(base_output_dir, "graphs", ckpt_name)
     os.makedirs(save_ckpt_graphs_path, exist_ok=True)
 
@@ -40,35 +95,50 @@ def generate_graph_path(ckpt_name: str, model_name: str) -> str:
     return graph_file_path
 
 
-def get_calibrate_info(filename: str) -> Union[None, Dict]:
-    calibration_path = Path(select_checkpoint().filename).parent / filename
+def _parse_weight_scales(text: str) -> np.ndarray:
+    weight = np.fromstring(text, dtype=np.float64, sep=",")
+    # np.fromstring stops at the first malformed value instead of raising
+    if weight.size != text.count(",") + 1:
+        raise ValueError(f"Invalid weight scales in calibrate info: {text[:64]}...")
+    return weight
+
+
+def get_calibrate_info(calibration_path: Path) -> Union[None, Dict]:
     if not calibration_path.exists():
         return None
 
     logger.info(f"Got calibrate info at {str(calibration_path)}")
-    calibrate_info = {}
-    with open(calibration_path, "r") as f:
-        for line in f.readlines():
+    # each line is "<name> <scale> <zero_point> <v0,v1,...>", the weight scales
+    # are parsed while streaming so their text is never held for the whole file
+    names, scales, zero_points, weights = [], [], [], []
+    with open(calibration_path, "r", buffering=1 << 20) as f:
+        for line in f:
             line = line.strip()
-            items = line.split(" ")
-            calibrate_info[items[0]] = [
-                float(items[1]),
-                int(items[2]),
-                [float(x) for x in items[3].split(",")],
-            ]
+            if not line:
+                continue
+            items = line.split(" ", 3)
+            names.append(items[0])
+            scales.append(items[1])
+            zero_points.append(items[2])
+            weights.append(_parse_weight_scales(items[3]))
+    if not names:
+        return {}
+
+    scales = np.array(scales, dtype=np.float64).tolist()
+    zero_points = np.array(zero_points, dtype=np.int64).tolist()
+    calibrate_info = {
+        name: [scale, zero_point, weight]
+        for name, scale, zero_point, weight in zip(names, scales, zero_points, weights)
+    }
     return calibrate_info
 
 
 def compile_unet(
     unet_model, quantization=False, *, options=None,
 ):
-    from ldm.modules.diffusionmodules.openaimodel import UNetModel as UNetModelLDM
-    from sgm.modules.diffusionmodules.openaimodel import UNetModel as UNetModelSGM
-
-    if isinstance(unet_model, UNetModelLDM):
-        compiled_unet = compile_ldm_unet(unet_model, options=options)
-    elif isinstance(unet_model, UNetModelSGM):
-        compiled_unet = compile_sgm_unet(unet_model, options=options)
+    compile_fn = _get_unet_compiler(type(unet_model))
+    if compile_fn is not None:
+        compiled_unet = compile_fn(unet_model, options=options)
     else:
         warnings.warn(
             f"Unsupported model type: {type(unet_model)} for compilation , skip",
@@ -76,9 +146,10 @@ def compile_unet(
         )
         compiled_unet = unet_model
     # In OneDiff Community, quantization can be True when called by api
-    if quantization and varify_can_use_quantization():
+    if quantization and _can_use_quantization():
+        ckpt_path = Path(select_checkpoint().filename)
         calibrate_info = get_calibrate_info(
-            f"{Path(select_checkpoint().filename).stem}_sd_calibrate_info.txt"
+            ckpt_path.parent / f"{ckpt_path.stem}_sd_calibrate_info.txt"
         )
         compiled_unet = quantize_model(
             compiled_unet, inplace=False, calibrate_info=calibrate_info
@@ -93,17 +164,27 @@ class UnetCompileCtx(object):
     """
 
     def __enter__(self):
-        self._original_model = shared.sd_model.model.diffusion_model
+        # keep the wrapper the unet was swapped on, in case shared.sd_model changes meanwhile
+        self._parent = shared.sd_model.model
+        self._original_model = self._parent.diffusion_model
         global compiled_unet
-        shared.sd_model.model.diffusion_model = compiled_unet
+        self._parent.diffusion_model = compiled_unet
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        shared.sd_model.model.diffusion_model = self._original_model
+        self._parent.diffusion_model = self._original_model
         return False
 
 
+_MODEL_TYPE_KEYS = ("is_sdxl", "is_sd2", "is_sd1", "is_ssd")
+
+
+def _get_model_type(model):
+    return tuple(getattr(model, key, False) for key in _MODEL_TYPE_KEYS)
+
+
 class Script(scripts.Script):
     current_type = None
+    checked_ckpt_name = None
 
     def title(self):
         return "onediff_diffusion_model"
@@ -113,29 +194,8 @@ class Script(scripts.Script):
         The return value should be an array of all components that are used in processing.
         Values of those returned components will be passed to run() and process() functions.
         """
-        if not varify_can_use_quantization():
-            ret = gr.HTML(
-                """
-                    <div style="padding: 20px; border: 1px solid #e0e0e0; border-radius: 5px; background-color: #f9f9f9;">
-                        <div style="font-size: 18px; font-weight: bold; margin-bottom: 15px; color: #31708f;">
-                            Hints Message
-                        </div>
-                        <div style="padding: 10px; border: 1px solid #31708f; border-radius: 5px; background-color: #f9f9f9;">
-                            Hints: Enterprise function is not supported on your system.
-                        </div>
-                        <p style="margin-top: 15px;">
-                            If you need Enterprise Level Support for your system or business, please send an email to 
-                            <a href="mailto:business@siliconflow.com" style="color: #31708f; text-decoration: none;">business@siliconflow.com</a>.
-                            <br>
-                            Tell us about your use case, deployment scale, and requirements.
-                        </p>
-                        <p>
-                            <strong>GitHub Issue:</strong>
-                            <a href="https://github.com/siliconflow/onediff/issues" style="color: #31708f; text-decoration: none;">https://github.com/siliconflow/onediff/issues</a>
-                        </p>
-                    </div>
-                    """
-            )
+        if not _can_use_quantization():
+            ret = gr.HTML(_HINTS_HTML)
 
         else:
             ret = gr.components.Checkbox(label="Model Quantization(int8) Speed Up")
@@ -144,28 +204,17 @@ class Script(scripts.Script):
     def show(self, is_img2img):
         return True
 
-    def check_model_change(self, model):
-        is_changed = False
-
-        def get_model_type(model):
-            return {
-                "is_sdxl": model.is_sdxl,
-                "is_sd2": model.is_sd2,
-                "is_sd1": model.is_sd1,
-                "is_ssd": model.is_ssd,
-            }
-
-        if self.current_type == None:
-            is_changed = True
-        else:
-            for key, v in self.current_type.items():
-                if v != getattr(model, key):
-                    is_changed = True
-                    break
-
-        if is_changed == True:
-            self.current_type = get_model_type(model)
-        return is_changed
+    def check_model_change(self, model, ckpt_name=None):
+        # the sd type is fixed by the checkpoint, no need to compare it again
+        # until another checkpoint is loaded
+        if ckpt_name is not None and ckpt_name == self.checked_ckpt_name:
+            return False
+        self.checked_ckpt_name = ckpt_name
+        model_type = _get_model_type(model)
+        if model_type == self.current_type:
+            return False
+        self.current_type = model_type
+        return True
 
     def run(self, p, quantization=False):
         # For OneDiff Community, the input param `quantization` is a HTML string
@@ -177,7 +226,7 @@ class Script(scripts.Script):
         original_diffusion_model = shared.sd_model.model.diffusion_model
 
         ckpt_changed = current_checkpoint != compiled_ckpt_name
-        model_changed = self.check_model_change(shared.sd_model)
+        model_changed = self.check_model_change(shared.sd_model, current_checkpoint)
         quantization_changed = quantization != is_unet_quantized
         need_recompile = (
             (quantization and ckpt_changed) # always recompile when switching ckpt with 'int8 speed model' enabled
@@ -193,7 +242,7 @@ class Script(scripts.Script):
             )
         else:
             logger.info(
-                f"Model {current_checkpoint} has same sd type of graph type {self.current_type}, skip compile"
+                f"Model {current_checkpoint} has same sd type of graph type {dict(zip(_MODEL_TYPE_KEYS, self.current_type))}, skip compile"
             )
 
         with UnetCompileCtx(), VaeCompileCtx(), SD21CompileCtx(), HijackLoraActivate():
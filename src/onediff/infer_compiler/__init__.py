@@ -19,16 +19,68 @@ def oneflow_backend(gm, example_inputs, *args, **kwargs):
     if not with_interp:
         transformed_fn = fx_node_tranform(gm)
 
-    def wrapped_forward(*args, **kwargs):
-        def input_fn(value):
-            if isinstance(value, torch.Tensor):
-                return flow.utils.tensor.from_torch(value.contiguous())
-            else:
-                return value
+    from_torch = flow.utils.tensor.from_torch
+    to_torch = flow.utils.tensor.to_torch
+
+    def tensor_to_oneflow(value):
+        # from_torch needs contiguous storage, skip the extra call when it already is
+        return from_torch(value if value.is_contiguous() else value.contiguous())
+
+    def input_fn(value):
+        if isinstance(value, torch.Tensor):
+            return tensor_to_oneflow(value)
+        else:
+            return value
 
+    def map_nested_inputs(args, kwargs):
         args_tree = ArgsTree((args, kwargs), False, tensor_type=torch.Tensor)
         out = args_tree.map_leaf(input_fn)
-        args = out[0]
+        return out[0], out[1]
+
+    def build_input_converter(args, kwargs):
+        values = list(args) + list(kwargs.values())
+        if any(isinstance(v, (tuple, list, dict)) for v in values):
+            return map_nested_inputs
+
+        tensor_args = tuple(
+            i for i, v in enumerate(args) if isinstance(v, torch.Tensor)
+        )
+        tensor_kwargs = tuple(
+            k for k, v in kwargs.items() if isinstance(v, torch.Tensor)
+        )
+
+        if len(tensor_args) == len(args) and not tensor_kwargs:
+            # the usual dynamo case: every input is a tensor
+            def convert(args, kwargs):
+                return [tensor_to_oneflow(v) for v in args], kwargs
+
+        else:
+
+            def convert(args, kwargs):
+                args = list(args)
+                for i in tensor_args:
+                    args[i] = tensor_to_oneflow(args[i])
+                for k in tensor_kwargs:
+                    kwargs[k] = tensor_to_oneflow(kwargs[k])
+                return args, kwargs
+
+        return convert
+
+    # The graph module is called with the same argument layout on every step,
+    # so a converter specialized to the tensor positions is built once per
+    # layout and reused without per-leaf type checks.
+    input_converters = {}
+
+    def map_inputs(args, kwargs):
+        layout_key = (len(args), tuple(kwargs))
+        convert = input_converters.get(layout_key)
+        if convert is None:
+            convert = build_input_converter(args, kwargs)
+            input_converters[layout_key] = convert
+        return convert(args, kwargs)
+
+    def wrapped_forward(*args, **kwargs):
+        args, kwargs = map_inputs(args, kwargs)
         if with_interp:
             output = OneFlowInterpreter(gm, garbage_collect_values=False).run(
                 *args, **kwargs
@@ -36,7 +88,9 @@ def oneflow_backend(gm, example_inputs, *args, **kwargs):
         else:
             output = transformed_fn(*args, **kwargs)
         if isinstance(output, tuple):
-            return tuple(flow.utils.tensor.to_torch(i) for i in output)
-        return flow.utils.tensor.to_torch(output)
+            if len(output) == 1:
+                return (to_torch(output[0]),)
+            return tuple(map(to_torch, output))
+        return to_torch(output)
 
     return wrapped_forward
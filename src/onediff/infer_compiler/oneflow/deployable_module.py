@@ -15,6 +15,10 @@ from ..deployable_module import DeployableModule
 from .utils import handle_deployable_exception, get_mixed_dual_module, get_oneflow_graph
 
 
+def _decode_build(graph, *args, **kwargs):
+    return graph.model.decode(*args, **kwargs)
+
+
 class OneflowDeployableModule(DeployableModule):
     def __init__(
         self, torch_module, oneflow_module, dynamic=True, options=None,
@@ -57,21 +61,22 @@ class OneflowDeployableModule(DeployableModule):
         return instance
 
     def get_graph(self):
-        if self._deployable_module_dpl_graph is not None:
-            return self._deployable_module_dpl_graph
-        self._deployable_module_dpl_graph = get_oneflow_graph(
+        dpl_graph = self._deployable_module_dpl_graph
+        if dpl_graph is not None:
+            return dpl_graph
+        dpl_graph = get_oneflow_graph(
             self._deployable_module_model.oneflow_module,
             self._deployable_module_options.max_cached_graph_size,
             self._deployable_module_enable_dynamic,
         )
         # Enable debug mode
         if transform_mgr.debug_mode:
-            self._deployable_module_dpl_graph.debug(0)
-        if self._deployable_module_options.debug_level > 0:
-            self._deployable_module_dpl_graph.debug(
-                self._deployable_module_options.debug_level
-            )
-        return self._deployable_module_dpl_graph
+            dpl_graph.debug(0)
+        debug_level = self._deployable_module_options.debug_level
+        if debug_level > 0:
+            dpl_graph.debug(debug_level)
+        self._deployable_module_dpl_graph = dpl_graph
+        return dpl_graph
 
     @input_output_processor
     @handle_deployable_exception
@@ -127,12 +132,10 @@ class OneflowDeployableModule(DeployableModule):
     @graph_file_management
     def decode(self, *args, **kwargs):
         if self._deployable_module_options.use_graph:
-
-            def _build(graph, *args, **kwargs):
-                return graph.model.decode(*args, **kwargs)
-
             dpl_graph = self.get_graph()
-            dpl_graph.build = types.MethodType(_build, dpl_graph)
+            if not getattr(dpl_graph, "_is_decode_build", False):
+                dpl_graph.build = types.MethodType(_decode_build, dpl_graph)
+                dpl_graph._is_decode_build = True
             with oneflow_exec_mode():
                 output = dpl_graph(*args, **kwargs)
         else:
@@ -36,6 +36,10 @@ def generate_graph_file_name(file_path, deployable_module, args, kwargs):
 def graph_file_management(func):
     @wraps(func)
     def wrapper(self, *args, **kwargs):
+        # steady state: the graph file was already handled on the first run
+        if not getattr(self, "_load_graph_first_run", True):
+            return func(self, *args, **kwargs)
+
         compile_options = (
             self._deployable_module_options
             if hasattr(self, "_deployable_module_options")
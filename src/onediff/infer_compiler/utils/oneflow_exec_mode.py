@@ -3,7 +3,30 @@ import oneflow as flow
 _ONEFLOW_EXEC_MODE = False
 
 
+def _enter_oneflow_exec_mode(enabled=True):
+    global _ONEFLOW_EXEC_MODE
+    prev_mode = _ONEFLOW_EXEC_MODE
+    _ONEFLOW_EXEC_MODE = enabled
+    prev_grad_mode = flow.is_grad_enabled()
+    # Only touch the grad mode when it actually changes, nested or repeated
+    # entries (one per denoising step) then cost a flag swap.
+    if prev_grad_mode:
+        _ = flow.set_grad_enabled(False)
+    return prev_mode, prev_grad_mode
+
+
+def _exit_oneflow_exec_mode(state):
+    global _ONEFLOW_EXEC_MODE
+    prev_mode, prev_grad_mode = state
+    _ONEFLOW_EXEC_MODE = prev_mode
+    # restore whenever it differs, the block may have re-enabled grad itself
+    if flow.is_grad_enabled() != prev_grad_mode:
+        _ = flow.set_grad_enabled(prev_grad_mode)
+
+
 class oneflow_exec_mode(object):
+    __slots__ = ("enabled", "_state")
+
     def __init__(self, enabled=None):
         if enabled is not None:
             self.enabled = enabled
@@ -11,16 +34,10 @@ class oneflow_exec_mode(object):
             self.enabled = True
 
     def __enter__(self):
-        global _ONEFLOW_EXEC_MODE
-        self.prev_mode = _ONEFLOW_EXEC_MODE
-        _ONEFLOW_EXEC_MODE = self.enabled
-        self.prev_grad_mode = flow.is_grad_enabled()
-        _ = flow.set_grad_enabled(False)
+        self._state = _enter_oneflow_exec_mode(self.enabled)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        global _ONEFLOW_EXEC_MODE
-        _ONEFLOW_EXEC_MODE = self.prev_mode
-        _ = flow.set_grad_enabled(self.prev_grad_mode)
+        _exit_oneflow_exec_mode(self._state)
 
 
 def oneflow_exec_mode_enabled():
@@ -38,11 +38,10 @@ def online_quantize_model(
 
 def quantize_and_deploy_wrapper(func):
     def wrapper(self: "DeployableModule", *args, **kwargs):
-        torch_model = self._torch_module
         quant_config = self._deployable_module_quant_config
         if quant_config:
             torch_model, _ = online_quantize_model(
-                torch_model, args, kwargs,
+                self._torch_module, args, kwargs,
                 module_selector=lambda x: x,
                 quant_config=quant_config,
                 inplace=True,